@@ -1,30 +1,47 @@
 import streamlit as st
 import polars as pl
-import pandas as pd
 import requests
-from datetime import datetime, timedelta
-import locale
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, timedelta
 import plotly.express as px
+import plotly.graph_objects as go
 import logging
 from concurrent.futures import ThreadPoolExecutor
-import json
+import orjson
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Definir o local para a formatação monetária
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    logger.warning("Locale 'pt_BR.UTF-8' não disponível, usando padrão.")
-    locale.setlocale(locale.LC_ALL, '')
+# Tabela de tradução para o padrão monetário brasileiro (1.234,56), montada uma única vez
+_SEPARADORES_BRL = str.maketrans(",.", ".,")
 
 # Configuração das URLs e tabelas do Supabase
+# Schema fixo das páginas: sem ele o Polars infere os tipos pelas primeiras linhas de cada página
+# (um PVENDA inteiro no início truncaria os decimais seguintes)
+SCHEMA_PCPEDC = {
+    'NUMPED': pl.Utf8,
+    'PVENDA': pl.Float64,
+    'QT': pl.Float64,
+    'CODFILIAL': pl.Utf8,
+    'DATA_PEDIDO': pl.Utf8,
+}
+COLUNAS_PCPEDC = list(SCHEMA_PCPEDC)
+
 SUPABASE_TABLES = [
     {
         "table_name": "PCPEDC",
-        "url": f"{st.secrets['SUPABASE_URL']}/rest/v1/PCPEDC?select=*"
+        "schema": SCHEMA_PCPEDC,
+        # Projeção e filtros aplicados no PostgREST: só as colunas usadas, filiais 1 e 2 e datas preenchidas.
+        # A ordenação por todas as colunas projetadas torna as páginas (Range) determinísticas: sem ORDER BY o
+        # Postgres pode devolver as linhas em outra ordem a cada requisição e as páginas paralelas pulariam/repetiriam
+        # registros; linhas que ainda empatam são idênticas, então o resultado é o mesmo
+        "url": (
+            f"{st.secrets['SUPABASE_URL']}/rest/v1/PCPEDC"
+            f"?select={','.join(COLUNAS_PCPEDC)}&CODFILIAL=in.(1,2)&DATA_PEDIDO=not.is.null"
+            "&order=DATA_PEDIDO,NUMPED,CODFILIAL,PVENDA,QT"
+        )
     },
 ]
 
@@ -40,62 +57,98 @@ def get_headers():
         st.error(f"Erro: Variável {e} não encontrada no secrets.toml. Verifique a configuração no Streamlit Cloud.")
         st.stop()
 
+# Sessão HTTP persistente (keep-alive + retry) compartilhada entre páginas e reruns
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]),
+        pool_connections=4,
+        pool_maxsize=16
+    )
+    session.mount("https://", adapter)
+    session.headers.update(get_headers())
+    return session
+
+# Função para buscar uma página (intervalo Range) de uma tabela
+def fetch_page(session, url, offset, page_size, extra_headers=None):
+    headers = {"Range": f"{offset}-{offset + page_size - 1}"}
+    if extra_headers:
+        headers.update(extra_headers)
+    response = session.get(url, headers=headers, timeout=30)
+    response.raise_for_status()
+    return response, orjson.loads(response.content)
+
 # Função para carregar dados de uma única tabela
-def fetch_table_data(table, page_size=1000):
+# Cada página vira um DataFrame assim que chega, então a lista de dicts nunca passa do tamanho de uma página
+def fetch_table_data(table, page_size=1000, max_workers=8):
     table_name = table["table_name"]
     url = table["url"]
-    logger.info(f"Carregando dados da tabela {table_name}")
-    all_data = []
-
-    offset = 0
-    while True:
-        headers = get_headers()
-        headers["Range"] = f"{offset}-{offset + page_size - 1}"
-        
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            if not data:
-                logger.info(f"Finalizada a recuperação de dados da tabela {table_name}")
-                break
-            all_data.extend(data)
-            offset += page_size
-            logger.info(f"Recuperados {len(data)} registros da tabela {table_name}, total até agora: {len(all_data)}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao buscar dados da tabela {table_name}: {e}")
-            return []
-
-    return all_data
+    schema = table["schema"]
+    logger.info("Carregando dados da tabela %s", table_name)
+    session = get_session()
+
+    try:
+        # A primeira página informa o total de registros no Content-Range (ex.: 0-999/54321)
+        response, data = fetch_page(session, url, 0, page_size, {"Prefer": "count=exact"})
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        paginas = [pl.DataFrame(data, schema=schema, strict=False)] if data else []
+
+        if total.isdigit():
+            # Com o total conhecido, as páginas restantes são buscadas em paralelo
+            offsets = range(page_size, int(total), page_size)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for _, data in executor.map(lambda offset: fetch_page(session, url, offset, page_size), offsets):
+                    if data:
+                        paginas.append(pl.DataFrame(data, schema=schema, strict=False))
+        else:
+            # Sem contagem no cabeçalho, percorre as páginas sequencialmente
+            offset = page_size
+            while True:
+                _, data = fetch_page(session, url, offset, page_size)
+                if not data:
+                    break
+                paginas.append(pl.DataFrame(data, schema=schema, strict=False))
+                offset += page_size
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error("Erro ao buscar dados da tabela %s: %s", table_name, e)
+        return pl.DataFrame()
+
+    if not paginas:
+        return pl.DataFrame()
+
+    # Todas as páginas seguem o mesmo schema; diagonal_relaxed só protege contra páginas vazias ou colunas ausentes
+    tabela = pl.concat(paginas, how="diagonal_relaxed")
+    logger.info("Finalizada a recuperação de dados da tabela %s: %d registros", table_name, len(tabela))
+    return tabela
 
 # Função para carregar dados do Supabase com cache, paralelismo e Polars
-@st.cache_data(show_spinner=False, ttl=900)
+# cache_resource compartilha o mesmo DataFrame entre sessões sem serializar uma cópia a cada rerun;
+# quem consome o resultado deve apenas derivar novos frames (filter/select/with_columns), nunca alterá-lo
+@st.cache_resource(show_spinner=False, ttl=900)
 def carregar_dados():
     try:
         # Carregar dados em paralelo usando ThreadPoolExecutor
         with ThreadPoolExecutor() as executor:
             results = list(executor.map(fetch_table_data, SUPABASE_TABLES))
 
-        # Combinar todos os dados
-        all_data = []
-        for result in results:
-            all_data.extend(result)
+        # Combinar as tabelas no formato colunar
+        frames = [result for result in results if not result.is_empty()]
 
-        if not all_data:
+        if not frames:
             logger.warning("Nenhum dado retornado pela API")
             st.error("Nenhum dado retornado pela API.")
-            return pl.DataFrame()
+            return pl.DataFrame(), {}
 
-        # Converter para Polars DataFrame
-        data = pl.DataFrame(all_data)
+        data = pl.concat(frames, how="diagonal_relaxed")
 
         # Verificar se as colunas necessárias existem
         required_columns = ['PVENDA', 'QT', 'CODFILIAL', 'DATA_PEDIDO', 'NUMPED']
         missing_columns = [col for col in required_columns if col not in data.columns]
         if missing_columns:
-            logger.error(f"Colunas ausentes nos dados: {missing_columns}")
+            logger.error("Colunas ausentes nos dados: %s", missing_columns)
             st.error(f"Colunas ausentes nos dados retornados pela API: {missing_columns}")
-            return pl.DataFrame()
+            return pl.DataFrame(), {}
 
         # Garantir tipos de dados
         data = data.with_columns([
@@ -103,51 +156,75 @@ def carregar_dados():
             pl.col('QT').cast(pl.Int32, strict=False).fill_null(0),
             pl.col('CODFILIAL').cast(pl.Utf8),
             pl.col('NUMPED').cast(pl.Utf8),
-            pl.col('DATA_PEDIDO').str.to_datetime(format="%Y-%m-%d", strict=False)
+            pl.col('DATA_PEDIDO').str.to_date(format="%Y-%m-%d", strict=False)
         ])
 
         # Calcular VLTOTAL como PVENDA * QT
         data = data.with_columns((pl.col('PVENDA') * pl.col('QT')).alias('VLTOTAL'))
 
-        # Filtrar apenas filiais 1 e 2
-        data = data.filter(pl.col('CODFILIAL').is_in(['1', '2']))
+        # A consulta já traz apenas as filiais 1 e 2; guardar CODFILIAL como Enum (códigos inteiros em vez de strings)
+        data = data.with_columns(pl.col('CODFILIAL').cast(pl.Enum(['1', '2'])))
 
         # Remover registros com DATA_PEDIDO nula
         if data['DATA_PEDIDO'].is_null().any():
             logger.warning("Valores inválidos encontrados na coluna 'DATA_PEDIDO'. Filtrando registros inválidos.")
             data = data.filter(pl.col('DATA_PEDIDO').is_not_null())
 
-        logger.info(f"Dados carregados com sucesso: {len(data)} registros")
-        return data
+        # Máscaras booleanas por filial, calculadas uma vez por carga para evitar reprocessar CODFILIAL a cada interação
+        mascaras_filial = {filial: data['CODFILIAL'] == filial for filial in ['1', '2']}
+
+        logger.info("Dados carregados com sucesso: %d registros", len(data))
+        return data, mascaras_filial
 
     except Exception as e:
-        logger.error(f"Erro geral ao processar dados: {e}")
+        logger.error("Erro geral ao processar dados: %s", e)
         st.error(f"Erro ao processar dados: {e}")
-        return pl.DataFrame()
+        return pl.DataFrame(), {}
+
+# Assinatura barata do DataFrame para o cache das funções de cálculo (evita o hash linha a linha do Streamlit)
+def _assinatura_frame(df):
+    if df.is_empty():
+        return (0,)
+    # hash_rows é vetorizado e cobre o conteúdo de todas as linhas; NUMPED.n_unique distingue recortes por pedido
+    return (df.height, df['NUMPED'].n_unique(), int(df.hash_rows().sum()), df['DATA_PEDIDO'].min(), df['DATA_PEDIDO'].max())
+
+# Funções de cálculo ajustadas para Polars: cada uma devolve expressões, avaliadas juntas em calcular_indicadores
+# Faturamento e pedidos de hoje, ontem e das semanas
+def expressoes_faturamento_e_pedidos(hoje, ontem, semana_inicial, semana_passada_inicial):
+    periodos = [
+        pl.col('DATA_PEDIDO') == hoje,
+        pl.col('DATA_PEDIDO') == ontem,
+        pl.col('DATA_PEDIDO').is_between(semana_inicial, hoje),
+        (pl.col('DATA_PEDIDO') >= semana_passada_inicial) & (pl.col('DATA_PEDIDO') < semana_inicial),
+    ]
+    return (
+        [pl.col('VLTOTAL').filter(periodo).sum().alias(f'faturamento_{i}') for i, periodo in enumerate(periodos)] +
+        [pl.col('NUMPED').filter(periodo).n_unique().alias(f'pedidos_{i}') for i, periodo in enumerate(periodos)]
+    )
 
-# Funções de cálculo ajustadas para Polars
-def calcular_faturamento(data, hoje, ontem, semana_inicial, semana_passada_inicial):
-    faturamento_hoje = data.filter(pl.col('DATA_PEDIDO') == hoje)['VLTOTAL'].sum()
-    faturamento_ontem = data.filter(pl.col('DATA_PEDIDO') == ontem)['VLTOTAL'].sum()
-    faturamento_semanal_atual = data.filter((pl.col('DATA_PEDIDO') >= semana_inicial) & (pl.col('DATA_PEDIDO') <= hoje))['VLTOTAL'].sum()
-    faturamento_semanal_passada = data.filter((pl.col('DATA_PEDIDO') >= semana_passada_inicial) & (pl.col('DATA_PEDIDO') < semana_inicial))['VLTOTAL'].sum()
-    return faturamento_hoje, faturamento_ontem, faturamento_semanal_atual, faturamento_semanal_passada
-
-def calcular_quantidade_pedidos(data, hoje, ontem, semana_inicial, semana_passada_inicial):
-    pedidos_hoje = data.filter(pl.col('DATA_PEDIDO') == hoje)['NUMPED'].n_unique()
-    pedidos_ontem = data.filter(pl.col('DATA_PEDIDO') == ontem)['NUMPED'].n_unique()
-    pedidos_semanal_atual = data.filter((pl.col('DATA_PEDIDO') >= semana_inicial) & (pl.col('DATA_PEDIDO') <= hoje))['NUMPED'].n_unique()
-    pedidos_semanal_passada = data.filter((pl.col('DATA_PEDIDO') >= semana_passada_inicial) & (pl.col('DATA_PEDIDO') < semana_inicial))['NUMPED'].n_unique()
-    return pedidos_hoje, pedidos_ontem, pedidos_semanal_atual, pedidos_semanal_passada
-
-def calcular_comparativos(data, hoje, mes_atual, ano_atual):
-    mes_anterior = mes_atual - 1 if mes_atual > 1 else 12
-    ano_anterior = ano_atual if mes_atual > 1 else ano_atual - 1
-    faturamento_mes_atual = data.filter((pl.col('DATA_PEDIDO').dt.month() == mes_atual) & (pl.col('DATA_PEDIDO').dt.year() == ano_atual))['VLTOTAL'].sum()
-    pedidos_mes_atual = data.filter((pl.col('DATA_PEDIDO').dt.month() == mes_atual) & (pl.col('DATA_PEDIDO').dt.year() == ano_atual))['NUMPED'].n_unique()
-    faturamento_mes_anterior = data.filter((pl.col('DATA_PEDIDO').dt.month() == mes_anterior) & (pl.col('DATA_PEDIDO').dt.year() == ano_anterior))['VLTOTAL'].sum()
-    pedidos_mes_anterior = data.filter((pl.col('DATA_PEDIDO').dt.month() == mes_anterior) & (pl.col('DATA_PEDIDO').dt.year() == ano_anterior))['NUMPED'].n_unique()
-    return faturamento_mes_atual, faturamento_mes_anterior, pedidos_mes_atual, pedidos_mes_anterior
+# Comparativo mensal por intervalo de datas (sem extrair mês/ano linha a linha)
+def expressoes_comparativos(mes_atual, ano_atual):
+    inicio_mes_atual = date(ano_atual, mes_atual, 1)
+    inicio_mes_seguinte = (inicio_mes_atual + timedelta(days=32)).replace(day=1)
+    inicio_mes_anterior = (inicio_mes_atual - timedelta(days=1)).replace(day=1)
+    mes_corrente = pl.col('DATA_PEDIDO').is_between(inicio_mes_atual, inicio_mes_seguinte, closed='left')
+    mes_passado = pl.col('DATA_PEDIDO').is_between(inicio_mes_anterior, inicio_mes_atual, closed='left')
+    return [
+        pl.col('VLTOTAL').filter(mes_corrente).sum().alias('faturamento_mes_atual'),
+        pl.col('VLTOTAL').filter(mes_passado).sum().alias('faturamento_mes_anterior'),
+        pl.col('NUMPED').filter(mes_corrente).n_unique().alias('pedidos_mes_atual'),
+        pl.col('NUMPED').filter(mes_passado).n_unique().alias('pedidos_mes_anterior'),
+    ]
+
+# Todos os indicadores em um único plano lazy, coletado uma vez
+@st.cache_data(show_spinner=False, ttl=900, hash_funcs={pl.DataFrame: _assinatura_frame})
+def calcular_indicadores(data, hoje, ontem, semana_inicial, semana_passada_inicial):
+    expressoes = (
+        expressoes_faturamento_e_pedidos(hoje, ontem, semana_inicial, semana_passada_inicial) +
+        expressoes_comparativos(hoje.month, hoje.year)
+    )
+    resultado = data.lazy().select(expressoes).collect().row(0)
+    return resultado[:4], resultado[4:8], resultado[8:]
 
 def calcular_variacao(atual, anterior):
     if anterior == 0:
@@ -163,10 +240,15 @@ def icone_variacao(valor):
         return f"{valor:.2f}%"
 
 def formatar_valor(valor):
-    try:
-        return locale.currency(valor, grouping=True, symbol=True)
-    except Exception:
-        return f"R$ {valor:,.2f}"
+    return f"R$ {valor:,.2f}".translate(_SEPARADORES_BRL)
+
+# Gráfico de pizza construído direto com graph_objects (sem o DataFrame interno do plotly.express)
+# Em cache pelos valores: reruns com os mesmos totais reutilizam a figura pronta
+@st.cache_data(show_spinner=False, ttl=60)
+def grafico_pizza_variacao(labels, valores, titulo):
+    return go.Figure(
+        go.Pie(labels=labels, values=valores, hole=0.4, marker_colors=["green", "red"])
+    ).update_layout(title=titulo, margin=dict(t=30, b=30, l=30, r=30))
 
 def main():
     st.markdown(""" <style>
@@ -209,7 +291,7 @@ def main():
 
     # Carregar dados com cache
     with st.spinner("Carregando dados do Supabase..."):
-        data = carregar_dados()
+        data, mascaras_filial = carregar_dados()
 
     if data.is_empty():
         st.error("Não foi possível carregar os dados. Verifique as configurações da API ou tente novamente.")
@@ -233,21 +315,24 @@ def main():
         st.warning("Por favor, selecione pelo menos uma filial para exibir os dados.")
         return
 
-    # Filtrar dados com base nas filiais selecionadas
-    data_filtrada = data.filter(pl.col('CODFILIAL').is_in(filiais_selecionadas))
+    # Filtrar dados com base nas filiais selecionadas (os dados já contêm apenas as filiais 1 e 2)
+    if len(filiais_selecionadas) == len(mascaras_filial):
+        data_filtrada = data
+    else:
+        mascara = mascaras_filial[filiais_selecionadas[0]]
+        for filial in filiais_selecionadas[1:]:
+            mascara = mascara | mascaras_filial[filial]
+        data_filtrada = data.filter(mascara)
 
-    today = datetime.today()  # Obter a data atual com hora
-    hoje = pd.to_datetime(today).normalize()  # Normalizar para meia-noite
+    hoje = date.today()  # DATA_PEDIDO é pl.Date, então comparamos datas diretamente
     ontem = hoje - timedelta(days=1)
     semana_inicial = hoje - timedelta(days=hoje.weekday())
     semana_passada_inicial = semana_inicial - timedelta(days=7)
 
-    faturamento_hoje, faturamento_ontem, faturamento_semanal_atual, faturamento_semanal_passada = calcular_faturamento(data_filtrada, hoje, ontem, semana_inicial, semana_passada_inicial)
-    pedidos_hoje, pedidos_ontem, pedidos_semanal_atual, pedidos_semanal_passada = calcular_quantidade_pedidos(data_filtrada, hoje, ontem, semana_inicial, semana_passada_inicial)
-
-    mes_atual = hoje.month
-    ano_atual = hoje.year
-    faturamento_mes_atual, faturamento_mes_anterior, pedidos_mes_atual, pedidos_mes_anterior = calcular_comparativos(data_filtrada, hoje, mes_atual, ano_atual)
+    faturamentos, pedidos, comparativos = calcular_indicadores(data_filtrada, hoje, ontem, semana_inicial, semana_passada_inicial)
+    faturamento_hoje, faturamento_ontem, faturamento_semanal_atual, faturamento_semanal_passada = faturamentos
+    pedidos_hoje, pedidos_ontem, pedidos_semanal_atual, pedidos_semanal_passada = pedidos
+    faturamento_mes_atual, faturamento_mes_anterior, pedidos_mes_atual, pedidos_mes_anterior = comparativos
 
     # Calcular variações
     var_faturamento_mes = calcular_variacao(faturamento_mes_atual, faturamento_mes_anterior)
@@ -256,18 +341,6 @@ def main():
     var_pedidos_hoje = calcular_variacao(pedidos_hoje, pedidos_ontem)
     var_faturamento_semananterior = calcular_variacao(faturamento_semanal_atual, faturamento_semanal_passada)
 
-    def grafico_pizza_variacao(labels, valores, titulo):
-        fig = px.pie(
-            names=labels,
-            values=valores,
-            title=titulo,
-            hole=0.4,
-            color=labels,
-            color_discrete_map={"Positivo": "green", "Negativo": "red"}
-        )
-        fig.update_layout(margin=dict(t=30, b=30, l=30, r=30))
-        return fig
-
     # Definir colunas para exibição
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -348,17 +421,20 @@ def main():
 
     st.markdown("---")
 
-    col1, col2, col3, col4, col5 = st.columns(5)
-    with col1:
-        st.plotly_chart(grafico_pizza_variacao(["Hoje", "Ontem"], [abs(faturamento_hoje), abs(faturamento_ontem)], "Variação de Faturamento (Hoje x Ontem)"), use_container_width=True)
-    with col2:
-        st.plotly_chart(grafico_pizza_variacao(["Semana Atual", "Semana Passada"], [abs(faturamento_semanal_atual), abs(faturamento_semanal_passada)], "Variação de Faturamento (Semana)"), use_container_width=True)
-    with col3:
-        st.plotly_chart(grafico_pizza_variacao(["Mês Atual", "Mês Anterior"], [abs(faturamento_mes_atual), abs(faturamento_mes_anterior)], "Variação de Faturamento (Mês)"), use_container_width=True)
-    with col4:
-        st.plotly_chart(grafico_pizza_variacao(["Pedidos Mês Atual", "Pedidos Mês Passado"], [abs(pedidos_mes_atual), abs(pedidos_mes_anterior)], "Variação de Pedidos (Mês)"), use_container_width=True)
-    with col5:
-        st.plotly_chart(grafico_pizza_variacao(["Pedidos Hoje", "Pedidos Ontem"], [abs(pedidos_hoje), abs(pedidos_ontem)], "Variação de Pedidos (Hoje x Ontem)"), use_container_width=True)
+    graficos_pizza = [
+        grafico_pizza_variacao(labels, (abs(atual), abs(anterior)), titulo)
+        for labels, atual, anterior, titulo in (
+            (("Hoje", "Ontem"), faturamento_hoje, faturamento_ontem, "Variação de Faturamento (Hoje x Ontem)"),
+            (("Semana Atual", "Semana Passada"), faturamento_semanal_atual, faturamento_semanal_passada, "Variação de Faturamento (Semana)"),
+            (("Mês Atual", "Mês Anterior"), faturamento_mes_atual, faturamento_mes_anterior, "Variação de Faturamento (Mês)"),
+            (("Pedidos Mês Atual", "Pedidos Mês Passado"), pedidos_mes_atual, pedidos_mes_anterior, "Variação de Pedidos (Mês)"),
+            (("Pedidos Hoje", "Pedidos Ontem"), pedidos_hoje, pedidos_ontem, "Variação de Pedidos (Hoje x Ontem)"),
+        )
+    ]
+
+    for coluna, fig in zip(st.columns(5), graficos_pizza):
+        with coluna:
+            st.plotly_chart(fig, use_container_width=True)
 
     # Gráfico de linhas com seletores de data
     st.markdown("---")
@@ -401,8 +477,8 @@ def main():
 
     # Filtrar dados pelo período selecionado
     df_periodo = data_filtrada.filter(
-        (pl.col('DATA_PEDIDO') >= pd.to_datetime(data_inicial)) & 
-        (pl.col('DATA_PEDIDO') <= pd.to_datetime(data_final))
+        (pl.col('DATA_PEDIDO') >= data_inicial) & 
+        (pl.col('DATA_PEDIDO') <= data_final)
     )
     if df_periodo.is_empty():
         st.warning("Nenhum dado disponível para o período selecionado.")
@@ -419,16 +495,12 @@ def main():
         pl.col('VLTOTAL').sum().alias('Valor_Total_Vendido')
     ).sort(['Ano', 'Mês'])
 
-    # Converter para Pandas para compatibilidade com Plotly
-    vendas_por_mes_ano_pandas = vendas_por_mes_ano.to_pandas()
-
-    # Criar gráfico de linhas com uma linha por ano
-    fig = px.line(vendas_por_mes_ano_pandas, 
-                 x='Mês', 
-                 y='Valor_Total_Vendido', 
-                 color='Ano',
+    # Criar gráfico de linhas com uma linha por ano (colunas passadas direto ao Plotly, sem conversão para Pandas)
+    fig = px.line(x=vendas_por_mes_ano['Mês'].to_list(), 
+                 y=vendas_por_mes_ano['Valor_Total_Vendido'].to_list(), 
+                 color=vendas_por_mes_ano['Ano'].to_list(),
                  title=f'Vendas por Mês ({data_inicial.strftime("%d/%m/%Y")} a {data_final.strftime("%d/%m/%Y")})',
-                 labels={'Mês': 'Mês', 'Valor_Total_Vendido': 'Valor Total Vendido (R$)', 'Ano': 'Ano'},
+                 labels={'x': 'Mês', 'y': 'Valor Total Vendido (R$)', 'color': 'Ano'},
                  markers=True)
 
     # Ajustes visuais
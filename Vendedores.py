@@ -2,24 +2,24 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
-import locale
 import plotly.express as px
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from streamlit_autorefresh import st_autorefresh
 from supabase import create_client, Client
+import httpx
+import hashlib
+import io
+import os
 import time
+import uuid
+from pathlib import Path
 import logging
 import backoff
+from concurrent.futures import ThreadPoolExecutor
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configurar locale para formatação monetária
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    logger.warning("Locale 'pt_BR.UTF-8' não disponível. Usando formatação manual.")
-
 # Configuração do cliente Supabase usando secrets do Streamlit Cloud
 @st.cache_resource
 def init_supabase():
@@ -36,6 +36,17 @@ def init_supabase():
     
     try:
         supabase_client = create_client(SUPABASE_URL.strip(), SUPABASE_KEY.strip())
+        # Pool HTTP maior e persistente para as cargas paralelas (mantém URL base e headers do PostgREST)
+        sessao_padrao = supabase_client.postgrest.session
+        supabase_client.postgrest.session = httpx.Client(
+            base_url=sessao_padrao.base_url,
+            headers=sessao_padrao.headers,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=300),
+            http2=True,
+            timeout=30,
+            follow_redirects=True,
+        )
+        sessao_padrao.close()
         response = supabase_client.table('VWSOMELIER').select('CODPROD').limit(1).execute()
         if not response.data:
             logger.error("Nenhum dado retornado na query de teste para VWSOMELIER.")
@@ -48,55 +59,214 @@ def init_supabase():
 supabase = init_supabase()
 if supabase is None:
     logger.error("Falha ao inicializar Supabase. Encerrando.")
+    init_supabase.clear()  # Não manter a falha em cache: a próxima execução tenta conectar de novo
     st.stop()
 
-# Função para realizar o reload automático a cada 1 minuto
-def auto_reload():
-    if 'last_reload' not in st.session_state:
-        st.session_state.last_reload = time.time()
-    
-    current_time = time.time()
-    if current_time - st.session_state.last_reload >= 60:  # 60 segundos
-        st.session_state.last_reload = current_time
+# Contagem de VWSOMELIER compartilhada entre as sessões: no máximo uma consulta de verificação por minuto
+@st.cache_data(show_spinner=False, ttl=55)
+def contagem_vwsomelier():
+    return supabase.table('VWSOMELIER').select('CODPROD', count='exact', head=True).execute().count
+
+# Última contagem vista por qualquer sessão: o cache é limpo uma vez por mudança, e não uma vez por sessão aberta
+@st.cache_resource
+def estado_atualizacao():
+    return {'total_vwsomelier': None}
+
+# Reload automático a cada 1 minuto via timer no navegador; o cache só é limpo se VWSOMELIER mudou
+def verificar_atualizacao():
+    contagem_refresh = st_autorefresh(interval=60_000, key="vendedores_autorefresh")
+    if contagem_refresh == st.session_state.get('ultimo_refresh'):
+        return
+    st.session_state.ultimo_refresh = contagem_refresh
+
+    try:
+        total = contagem_vwsomelier()
+    except Exception as e:
+        logger.error(f"Erro ao verificar atualização da tabela VWSOMELIER: {e}")
+        return
+
+    estado = estado_atualizacao()
+    if estado['total_vwsomelier'] not in (None, total):
         st.cache_data.clear()  # Limpar o cache para forçar nova busca
-        st.rerun()  # Forçar reload da página
+        limpar_cache_disco()
+    estado['total_vwsomelier'] = total
+
+# Coluna de data usada no filtro de cada tabela
+COLUNAS_DATA = {
+    'VWSOMELIER': 'DATA',
+    'PCVENDEDOR': 'DATAPEDIDO',
+}
+
+# Dimensões do relatório de vendas mensais (as opcionais entram só se existirem em PCVENDEDOR)
+DIMENSOES_VENDAS = ('CODUSUR', 'VENDEDOR', 'ROTA', 'CODCLIENTE', 'CLIENTE', 'FANTASIA', 'FORNECEDOR', 'PRODUTO', 'BLOQUEADO')
+
+# Colunas de PCVENDEDOR das duas seções da página (detalhes por vendedor e relatório de vendas).
+# Uma projeção só: com o mesmo período, as duas seções caem na mesma entrada de cache de carregar_dados
+COLUNAS_PCVENDEDOR = ('PEDIDO', 'DATAPEDIDO', 'QUANTIDADE') + DIMENSOES_VENDAS
+
+# Colunas de VWSOMELIER usadas em calcular_detalhes_vendedores (DTCANCEL é opcional)
+COLUNAS_VWSOMELIER_DETALHES = ('DATA', 'PVENDA', 'QT', 'NUMPED', 'CODPROD', 'DTCANCEL')
+
+# Colunas existentes em cada tabela, lidas de uma linha de amostra; falhas não ficam em cache
+@st.cache_resource(ttl=3600)
+def colunas_disponiveis(tabela):
+    response = supabase.table(tabela).select("*").limit(1).execute()
+    return frozenset(response.data[0]) if response.data else frozenset()
+
+# Projeção para o select do PostgREST: só as colunas pedidas que existem na tabela.
+# Pedir uma coluna inexistente derruba a consulta, então sem a lista de colunas volta ao select("*")
+def projetar_colunas(tabela, colunas):
+    try:
+        existentes = colunas_disponiveis(tabela)
+    except Exception as e:
+        logger.warning(f"Não foi possível ler as colunas da tabela {tabela}: {e}")
+        return None
+    projetadas = tuple(col for col in colunas if col in existentes)
+    return projetadas or None
+
+# Colunas de texto repetitivo convertidas para category em carregar_dados
+COLUNAS_CATEGORICAS = ('FORNECEDOR', 'PRODUTO', 'VENDEDOR', 'BLOQUEADO', 'NOME')
+
+# PCVENDEDOR no período com a projeção compartilhada entre as seções
+def carregar_pcvendedor(data_inicial, data_final):
+    return carregar_dados('PCVENDEDOR', data_inicial, data_final, projetar_colunas('PCVENDEDOR', COLUNAS_PCVENDEDOR))
+
+# Segundo nível de cache em Parquet, usado só na partida a frio (primeira carga de cada chave no processo,
+# ex.: após reinício do app). Com o processo aquecido quem decide a validade é o TTL de 60 s da memória,
+# então o disco não estende a defasagem; mudanças na contagem de VWSOMELIER limpam os dois níveis
+PASTA_CACHE = Path(".cache")
+TTL_CACHE_DISCO = 900  # segundos
+INTERVALO_LIMPEZA_DISCO = 300  # segundos entre varreduras de arquivos vencidos
 
-# Função para obter dados do Supabase sem paginação
+def caminho_cache_disco(tabela, data_inicial, data_final, columns):
+    chave = hashlib.blake2b(f"{tabela}|{data_inicial}|{data_final}|{columns}".encode(), digest_size=16).hexdigest()
+    return PASTA_CACHE / f"{chave}.parquet"
+
+# Estado do cache em disco compartilhado entre sessões: chaves já carregadas neste processo e última limpeza
+@st.cache_resource
+def estado_cache_disco():
+    return {'chaves_carregadas': set(), 'ultima_limpeza': 0.0}
+
+def limpar_cache_disco(apenas_expirados=False):
+    agora = time.time()
+    for arquivo in [*PASTA_CACHE.glob("*.parquet"), *PASTA_CACHE.glob("*.tmp")]:
+        try:
+            if not apenas_expirados or agora - arquivo.stat().st_mtime >= TTL_CACHE_DISCO:
+                arquivo.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Não foi possível remover o cache em disco {arquivo}: {e}")
+
+# Grava o Parquet num arquivo temporário e troca de forma atômica: nenhuma leitura vê um arquivo pela metade
+def gravar_cache_disco(df, arquivo_cache):
+    PASTA_CACHE.mkdir(exist_ok=True)
+    estado = estado_cache_disco()
+    if time.time() - estado['ultima_limpeza'] >= INTERVALO_LIMPEZA_DISCO:
+        estado['ultima_limpeza'] = time.time()
+        limpar_cache_disco(apenas_expirados=True)  # Outros períodos/projeções vencidos não ficam acumulando em .cache/
+    temporario = arquivo_cache.with_name(f"{arquivo_cache.stem}.{uuid.uuid4().hex}.tmp")
+    try:
+        df.to_parquet(temporario, compression='zstd', index=False)
+        os.replace(temporario, arquivo_cache)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+# Função para obter dados do Supabase com paginação
+# columns (tupla) projeta só as colunas necessárias no PostgREST; None mantém select("*")
 @st.cache_data(show_spinner=False, ttl=60)
-def carregar_dados(tabela, data_inicial=None, data_final=None):
+def carregar_dados(tabela, data_inicial=None, data_final=None, columns=None):
     try:
         max_retries = 3
+        limit = 1000
+        coluna_data = COLUNAS_DATA.get(tabela)
+
+        arquivo_cache = caminho_cache_disco(tabela, data_inicial, data_final, columns)
+        chaves_carregadas = estado_cache_disco()['chaves_carregadas']
+        partida_fria = arquivo_cache.name not in chaves_carregadas
+        chaves_carregadas.add(arquivo_cache.name)
+        if partida_fria and arquivo_cache.exists() and time.time() - arquivo_cache.stat().st_mtime < TTL_CACHE_DISCO:
+            try:
+                df = pd.read_parquet(arquivo_cache)
+                logger.info(f"Tabela {tabela} lida do cache em disco: {len(df)} registros")
+                return df
+            except Exception as e:
+                logger.warning(f"Cache em disco inválido para tabela {tabela}, buscando no Supabase: {e}")
+
+        # Paginação por offset exige ordem determinística: data primeiro e depois todas as colunas lidas,
+        # assim linhas que ainda empatam são idênticas e nenhuma página pula ou repete registros
+        if columns:
+            colunas_ordem = list(columns)
+        else:
+            try:
+                colunas_ordem = sorted(colunas_disponiveis(tabela))
+            except Exception as e:
+                logger.warning(f"Não foi possível ler as colunas da tabela {tabela} para ordenar: {e}")
+                colunas_ordem = []
+        if coluna_data:
+            colunas_ordem = [coluna_data] + [col for col in colunas_ordem if col != coluna_data]
 
         @backoff.on_exception(backoff.expo, Exception, max_tries=max_retries)
-        def fetch_all():
-            query = supabase.table(tabela).select("*")
+        def fetch_page(offset):
+            query = supabase.table(tabela).select(",".join(columns) if columns else "*")
             if data_inicial and data_final:
-                if tabela == 'VWSOMELIER':
-                    query = query.gte('DATA', data_inicial.isoformat()).lte('DATA', data_final.isoformat())
-                elif tabela == 'PCVENDEDOR':
-                    query = query.gte('DATAPEDIDO', data_inicial.isoformat()).lte('DATAPEDIDO', data_final.isoformat())
+                if coluna_data:
+                    query = query.gte(coluna_data, data_inicial.isoformat()).lte(coluna_data, data_final.isoformat())
                 else:
                     logger.warning(f"Tabela {tabela} não reconhecida para filtro de data.")
-            return query.execute()
-
-        response = fetch_all()
-        response_data = response.data
-
-        if not response_data:
+            for coluna in colunas_ordem:
+                query = query.order(coluna)
+            return query.range(offset, offset + limit - 1).execute().data
+
+        # Cada página vira um DataFrame e a concatenação acontece uma única vez no final
+        paginas = []
+        offset = 0
+        while True:
+            response_data = fetch_page(offset)
+            if not response_data:
+                break
+            paginas.append(pd.DataFrame(response_data))
+            offset += limit
+
+        if not paginas:
             logger.warning(f"Nenhum dado encontrado na tabela {tabela} para o período {data_inicial} a {data_final}.")
             return pd.DataFrame()
 
-        df = pd.DataFrame(response_data)
+        df = pd.concat(paginas, ignore_index=True)
         df.columns = df.columns.str.strip()
+        # Textos de baixa cardinalidade como category já na carga: comparações, groupby e ordenação por código inteiro
+        df = df.astype({col: 'category' for col in COLUNAS_CATEGORICAS if col in df.columns})
+        # Coluna de data tipada uma vez na carga (ISO do PostgREST, sem inferir formato por valor); o Parquet já guarda datetime64
+        if coluna_data in df.columns:
+            df[coluna_data] = pd.to_datetime(df[coluna_data], format='ISO8601', errors='coerce')
 
         logger.info(f"Total de registros recuperados da tabela {tabela}: {len(df)}")
+
+        try:
+            gravar_cache_disco(df, arquivo_cache)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar o cache em disco da tabela {tabela}: {e}")
         return df
 
     except Exception as e:
         logger.error(f"Erro ao buscar dados do Supabase para tabela {tabela}: {e}")
         return pd.DataFrame()
 
-def calcular_detalhes_vendedores(data_vwsomelier, data_pcpedc, data_inicial, data_final):
+# Resultado em cache pelas datas: reruns com o mesmo período não refazem junção e agregações
+# Retorna None quando os dados do Supabase não puderam ser carregados
+@st.cache_data(show_spinner=False, ttl=60)
+def calcular_detalhes_vendedores(data_inicial, data_final):
+    # As duas consultas são I/O de rede independentes: buscar em paralelo
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futuro_vwsomelier = executor.submit(
+            carregar_dados, 'VWSOMELIER', data_inicial, data_final,
+            projetar_colunas('VWSOMELIER', COLUNAS_VWSOMELIER_DETALHES)
+        )
+        futuro_pcpedc = executor.submit(carregar_pcvendedor, data_inicial, data_final)
+        data_vwsomelier, data_pcpedc = futuro_vwsomelier.result(), futuro_pcpedc.result()
+
+    if data_vwsomelier.empty or data_pcpedc.empty:
+        logger.error("Não foi possível carregar os dados do Supabase.")
+        return None
+
     required_columns_vwsomelier = ['DATA', 'PVENDA', 'QT', 'NUMPED', 'CODPROD']
     required_columns_pcpedc = ['CODUSUR', 'VENDEDOR', 'CODCLIENTE', 'PEDIDO']
     
@@ -108,25 +278,24 @@ def calcular_detalhes_vendedores(data_vwsomelier, data_pcpedc, data_inicial, dat
         return pd.DataFrame(), pd.DataFrame()
 
     try:
-        data_vwsomelier['DATA'] = pd.to_datetime(data_vwsomelier['DATA'], errors='coerce')
         data_vwsomelier['PVENDA'] = pd.to_numeric(data_vwsomelier['PVENDA'], errors='coerce').fillna(0).astype('float32')
         data_vwsomelier['QT'] = pd.to_numeric(data_vwsomelier['QT'], errors='coerce').fillna(0).astype('int32')
-        data_vwsomelier['NUMPED'] = data_vwsomelier['NUMPED'].astype(str).str.strip()
-        data_pcpedc['CODUSUR'] = data_pcpedc['CODUSUR'].astype(str).str.strip()
-        data_pcpedc['CODCLIENTE'] = data_pcpedc['CODCLIENTE'].astype(str).str.strip()
-        data_pcpedc['PEDIDO'] = data_pcpedc['PEDIDO'].astype(str).str.strip()
+        # IDs numéricos: float -> Int64 -> string elimina o '.0' sem regex; valores não numéricos viram <NA>
+        data_vwsomelier['NUMPED'] = pd.to_numeric(data_vwsomelier['NUMPED'], errors='coerce').astype('Int64').astype('string[pyarrow]')
+        # Strings em Arrow: strip roda no kernel nativo do pyarrow, sem um objeto Python por linha
+        data_pcpedc['CODUSUR'] = data_pcpedc['CODUSUR'].astype('string[pyarrow]').str.strip()
+        data_pcpedc['CODCLIENTE'] = data_pcpedc['CODCLIENTE'].astype('string[pyarrow]').str.strip()
+        data_pcpedc['PEDIDO'] = pd.to_numeric(data_pcpedc['PEDIDO'], errors='coerce').astype('Int64').astype('string[pyarrow]')
     except Exception as e:
         logger.error(f"Erro ao converter tipos de dados: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
-    data_vwsomelier['NUMPED'] = data_vwsomelier['NUMPED'].str.replace(r'\.0$', '', regex=True)
-    data_pcpedc['PEDIDO'] = data_pcpedc['PEDIDO'].str.replace(r'\.0$', '', regex=True)
-
-    data_vwsomelier = data_vwsomelier[data_vwsomelier['NUMPED'].notna() & (data_vwsomelier['NUMPED'] != '')]
     data_pcpedc = data_pcpedc[data_pcpedc['PEDIDO'].notna() & (data_pcpedc['PEDIDO'] != '')]
 
-    data_filtrada = data_vwsomelier[(data_vwsomelier['DATA'] >= data_inicial) & 
-                                    (data_vwsomelier['DATA'] <= data_final)].copy()
+    # O período já vem filtrado do Supabase (gte/lte em DATA): uma única máscara descarta datas inválidas e pedidos vazios
+    data_filtrada = data_vwsomelier[
+        data_vwsomelier['DATA'].notna() & data_vwsomelier['NUMPED'].notna() & (data_vwsomelier['NUMPED'] != '')
+    ]
 
     if data_filtrada.empty:
         logger.warning("Não há dados para o período selecionado em VWSOMELIER.")
@@ -144,13 +313,18 @@ def calcular_detalhes_vendedores(data_vwsomelier, data_pcpedc, data_inicial, dat
     logger.info(f"Amostra de NUMPED: {data_vwsomelier['NUMPED'].head().tolist()}")
     logger.info(f"Amostra de PEDIDO: {data_pcpedc['PEDIDO'].head().tolist()}")
 
-    data_filtrada = data_filtrada.merge(
-        data_pcpedc[['PEDIDO', 'CODUSUR', 'VENDEDOR', 'CODCLIENTE']],
-        left_on='NUMPED',
-        right_on='PEDIDO',
-        how='left'
+    # Chaves da junção como Categorical com as mesmas categorias nos dois lados (códigos inteiros em vez de strings)
+    chaves = pd.CategoricalDtype(pd.Index(data_filtrada['NUMPED'].unique()).union(pd.Index(data_pcpedc['PEDIDO'].unique())))
+    data_filtrada = data_filtrada.assign(NUMPED=data_filtrada['NUMPED'].astype(chaves))
+
+    # Junção por índice: um pedido de PCVENDEDOR por linha da tabela de consulta, aplicada com Series.map
+    lookup = (
+        data_pcpedc.drop_duplicates('PEDIDO')
+        .astype({'PEDIDO': chaves})
+        .set_index('PEDIDO')[['CODUSUR', 'VENDEDOR', 'CODCLIENTE']]
     )
-    logger.info(f"Tamanho de data_filtrada após merge: {len(data_filtrada)}")
+    data_filtrada = data_filtrada.assign(**{col: data_filtrada['NUMPED'].map(lookup[col]) for col in lookup.columns})
+    logger.info(f"Tamanho de data_filtrada após junção: {len(data_filtrada)}")
 
     if data_filtrada.empty:
         logger.warning("Nenhum dado correspondente encontrado ao combinar VWSOMELIER e PCVENDEDOR.")
@@ -159,27 +333,41 @@ def calcular_detalhes_vendedores(data_vwsomelier, data_pcpedc, data_inicial, dat
     data_filtrada = data_filtrada[data_filtrada['PVENDA'].notna() & data_filtrada['QT'].notna()]
     logger.info(f"Linhas após remover NaN em PVENDA/QT: {len(data_filtrada)}")
 
-    data_filtrada['TOTAL_VENDAS'] = data_filtrada['PVENDA'] * data_filtrada['QT']
+    # PVENDA/QT ficam em float32/int32; só o produto que será somado usa float64 para não perder centavos
+    data_filtrada['TOTAL_VENDAS'] = data_filtrada['PVENDA'].astype('float64') * data_filtrada['QT']
 
-    vendedores = data_filtrada.groupby('CODUSUR').agg(
-        vendedor=('VENDEDOR', 'first'),
-        total_vendas=('TOTAL_VENDAS', 'sum'),
-        total_clientes=('CODCLIENTE', 'nunique'),
-        total_pedidos=('NUMPED', 'nunique'),
-    ).reset_index()
+    # Agregação mensal de todos os vendedores em uma única passada, consultada por vendedor no gráfico
+    vendas_mensais_vendedores = data_filtrada.groupby(
+        ['VENDEDOR', data_filtrada['DATA'].dt.to_period('M').rename('MÊS')], observed=True
+    ).agg(**{
+        'TOTAL VENDIDO': ('TOTAL_VENDAS', 'sum'),
+        'TOTAL CLIENTES': ('CODCLIENTE', 'nunique'),
+        'TOTAL PEDIDOS': ('NUMPED', 'nunique'),
+    })
+    # Mês como 'AAAA-MM' só nos níveis já agregados, em vez de um strftime por linha
+    vendas_mensais_vendedores.index = vendas_mensais_vendedores.index.set_levels(
+        vendas_mensais_vendedores.index.levels[1].strftime('%Y-%m'), level='MÊS'
+    )
 
-    vendedores['total_vendas'] = pd.to_numeric(vendedores['total_vendas'], errors='coerce').fillna(0)
-    logger.info(f"Valores em total_vendas após limpeza: {vendedores['total_vendas'].head().tolist()}")
+    # Contagens distintas via drop_duplicates + size (evita o nunique por grupo dentro do agg)
+    total_clientes = (
+        data_filtrada[['CODUSUR', 'CODCLIENTE']].dropna().drop_duplicates()
+        .groupby('CODUSUR', observed=True).size().rename('TOTAL CLIENTES')
+    )
+    total_pedidos = (
+        data_filtrada[['CODUSUR', 'NUMPED']].dropna().drop_duplicates()
+        .groupby('CODUSUR', observed=True).size().rename('TOTAL PEDIDOS')
+    )
+    # Nomes finais já no agg; só a chave do grupo é renomeada
+    vendedores = data_filtrada.groupby('CODUSUR', observed=True).agg(**{
+        'NOME': ('VENDEDOR', 'first'),
+        'TOTAL VENDAS': ('TOTAL_VENDAS', 'sum'),
+    }).join(total_clientes).join(total_pedidos).fillna({'TOTAL CLIENTES': 0, 'TOTAL PEDIDOS': 0}).astype({'TOTAL CLIENTES': 'int64', 'TOTAL PEDIDOS': 'int64'}).reset_index().rename(columns={'CODUSUR': 'RCA'})
 
-    vendedores.rename(columns={
-        'CODUSUR': 'RCA',
-        'vendedor': 'NOME',
-        'total_vendas': 'TOTAL VENDAS',
-        'total_clientes': 'TOTAL CLIENTES',
-        'total_pedidos': 'TOTAL PEDIDOS'
-    }, inplace=True)
+    vendedores['TOTAL VENDAS'] = pd.to_numeric(vendedores['TOTAL VENDAS'], errors='coerce').fillna(0)
+    logger.info(f"Valores em TOTAL VENDAS após limpeza: {vendedores['TOTAL VENDAS'].head().tolist()}")
 
-    return vendedores, data_filtrada
+    return vendedores, vendas_mensais_vendedores
 
 def exibir_detalhes_vendedores(vendedores):
     if vendedores.empty:
@@ -199,51 +387,26 @@ def exibir_detalhes_vendedores(vendedores):
     logger.info(f"Tipos de dados em vendedores: {vendedores.dtypes}")
     logger.info(f"Amostra de TOTAL VENDAS: {vendedores['TOTAL VENDAS'].head().tolist()}")
 
-    st.dataframe(vendedores.style.format({
-        'TOTAL VENDAS': formatar_valor,
-    }), use_container_width=True)
-
-def formatar_valor(valor):
-    try:
-        if pd.isna(valor) or valor is None:
-            return "R$ 0,00"
-        valor = float(valor)
-        return locale.currency(valor, grouping=True, symbol=True)
-    except (ValueError, TypeError, locale.Error):
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def exibir_grafico_vendas_por_vendedor(data, vendedor_selecionado, ano_selecionado):
-    dados_vendedor = data[
-        (data['VENDEDOR'] == vendedor_selecionado) & 
-        (data['DATA'].dt.year == ano_selecionado)
-    ].copy()
-
-    if dados_vendedor.empty:
-        logger.warning(f"Nenhum dado encontrado para o vendedor {vendedor_selecionado} no ano {ano_selecionado}.")
-        return
+    # TOTAL VENDAS continua numérico (ordenação correta na tabela); o Styler aplica o formato pt-BR (R$ 1.234,56) só na exibição
+    st.dataframe(
+        vendedores.style.format('R$ {:,.2f}', subset=['TOTAL VENDAS'], thousands='.', decimal=','),
+        use_container_width=True,
+    )
 
+def exibir_grafico_vendas_por_vendedor(vendas_mensais_vendedores, vendedor_selecionado, ano_selecionado):
     meses = [f"{ano_selecionado}-{str(m).zfill(2)}" for m in range(1, 13)]
-    vendas_mensais = pd.DataFrame({'MÊS': meses})
 
-    dados_vendedor['TOTAL_VENDAS'] = dados_vendedor['PVENDA'] * dados_vendedor['QT']
-
-    vendas_por_mes = dados_vendedor.groupby(dados_vendedor['DATA'].dt.strftime('%Y-%m')).agg(
-        total_vendas=('TOTAL_VENDAS', 'sum'),
-        total_clientes=('CODCLIENTE', 'nunique'),
-        total_pedidos=('NUMPED', 'nunique'),
-    ).reset_index().rename(columns={'DATA': 'MÊS'})
+    # Agregação mensal já calculada para todos os vendedores: aqui é só uma consulta pelo índice
+    try:
+        dados_vendedor = vendas_mensais_vendedores.loc[vendedor_selecionado]
+    except KeyError:
+        dados_vendedor = pd.DataFrame()
 
-    vendas_mensais = vendas_mensais.merge(vendas_por_mes, on='MÊS', how='left').fillna({
-        'total_vendas': 0,
-        'total_clientes': 0,
-        'total_pedidos': 0
-    })
+    if not dados_vendedor.index.isin(meses).any():
+        logger.warning(f"Nenhum dado encontrado para o vendedor {vendedor_selecionado} no ano {ano_selecionado}.")
+        return
 
-    vendas_mensais.rename(columns={
-        'total_vendas': 'TOTAL VENDIDO',
-        'total_clientes': 'TOTAL CLIENTES',
-        'total_pedidos': 'TOTAL PEDIDOS',
-    }, inplace=True)
+    vendas_mensais = dados_vendedor.reindex(meses, fill_value=0).reset_index(names='MÊS')
 
     fig = px.bar(
         vendas_mensais, 
@@ -276,48 +439,86 @@ def exibir_grafico_vendas_por_vendedor(data, vendedor_selecionado, ano_seleciona
     with col2:
         st.write("TOTAL DE PEDIDOS 🚚:", int(vendas_mensais['TOTAL PEDIDOS'].sum()))
 
-def criar_tabela_vendas_mensais(data, tipo_filtro, valores_filtro, vendedor=None):
+# PCVENDEDOR resumido por mês: QUANTIDADE somada por dimensões + MES_ANO uma vez por período,
+# assim os filtros e o pivot do relatório trabalham sobre o resumo e não sobre as linhas de pedido
+@st.cache_data(show_spinner=False, ttl=60)
+def carregar_vendas_mensais(data_inicial, data_final):
+    data = carregar_pcvendedor(data_inicial, data_final)
+    if data.empty:
+        return data
+
+    data = data.dropna(subset=['DATAPEDIDO'])
+    if data.empty:
+        return data
+
+    # MES_ANO ordenado cronologicamente: o pivot já sai com as colunas de mês em ordem
+    periodos = data['DATAPEDIDO'].dt.to_period('M')
+    meses_periodo = pd.period_range(periodos.min(), periodos.max(), freq='M')
+    # Rótulo 'AAAA-MM' formatado só nas categorias (um por mês), não em cada linha
+    data['MES_ANO'] = pd.Categorical(periodos, categories=meses_periodo, ordered=True).rename_categories(meses_periodo.astype(str))
+    data['QUANTIDADE'] = pd.to_numeric(data['QUANTIDADE'], errors='coerce', downcast='integer')
+
+    dimensoes = [col for col in DIMENSOES_VENDAS if col in data.columns]
+    vendas_mensais = data.groupby(dimensoes + ['MES_ANO'], observed=True, dropna=False, sort=False)['QUANTIDADE'].sum().reset_index()
+    logger.info(f"PCVENDEDOR resumido de {len(data)} para {len(vendas_mensais)} linhas mensais")
+
+    # Colunas de filtro como Categorical: as opções dos filtros já ficam ordenadas em .cat.categories
+    colunas_filtro = [col for col in ('FORNECEDOR', 'PRODUTO', 'VENDEDOR') if col in vendas_mensais.columns]
+    vendas_mensais = vendas_mensais.assign(**{
+        col: vendas_mensais[col].astype('category').cat.remove_unused_categories() for col in colunas_filtro
+    })
+    return vendas_mensais
+
+# Pivot em cache pelo conteúdo do recorte + filtro: repetir o relatório não refaz o pivot.
+# valores_filtro=None significa "todos": o isin vira só uma máscara notna (as opções nunca incluem nulos)
+@st.cache_data(show_spinner=False, ttl=300)
+def criar_tabela_vendas_mensais(data, tipo_filtro, valores_filtro):
     try:
         if data.columns.duplicated().any():
             data = data.loc[:, ~data.columns.duplicated()]
 
-        obrigatorias = ['DATAPEDIDO', 'CODCLIENTE', 'CLIENTE', 'QUANTIDADE']
+        obrigatorias = ['MES_ANO', 'CODCLIENTE', 'CLIENTE', 'QUANTIDADE']
         faltantes = [col for col in obrigatorias if col not in data.columns]
         if faltantes:
             logger.error(f"Colunas obrigatórias faltando: {', '.join(faltantes)}")
             return pd.DataFrame()
-        
-        data['DATAPEDIDO'] = pd.to_datetime(data['DATAPEDIDO'], errors='coerce')
-        data = data.dropna(subset=['DATAPEDIDO'])
-        data['MES_ANO'] = data['DATAPEDIDO'].dt.to_period('M').astype(str)
-
-        if vendedor and 'VENDEDOR' in data.columns:
-            data = data[data['VENDEDOR'] == vendedor].copy()
-            if data.empty:
-                return pd.DataFrame()
 
         if tipo_filtro == "Fornecedor":
             if 'FORNECEDOR' not in data.columns:
                 logger.error("A coluna 'FORNECEDOR' não está presente nos dados filtrados.")
                 return pd.DataFrame()
-            data = data[data['FORNECEDOR'].isin(valores_filtro)].copy()
+            if valores_filtro is None:
+                data = data[data['FORNECEDOR'].notna()].copy()
+            else:
+                data = data[data['FORNECEDOR'].isin(valores_filtro)].copy()
         elif tipo_filtro == "Produto":
             if 'PRODUTO' not in data.columns:
                 logger.error("A coluna 'PRODUTO' não está presente nos dados filtrados.")
                 return pd.DataFrame()
-            data = data[data['PRODUTO'].isin(valores_filtro)].copy()
+            if valores_filtro is None:
+                data = data[data['PRODUTO'].notna()].copy()
+            else:
+                data = data[data['PRODUTO'].isin(valores_filtro)].copy()
 
         if data.empty:
-            logger.warning(f"Nenhum dado encontrado para {tipo_filtro}: {', '.join(valores_filtro)}")
+            logger.warning(f"Nenhum dado encontrado para {tipo_filtro}: {', '.join(valores_filtro or ['todos'])}")
             return pd.DataFrame()
 
         group_cols = ['CODUSUR', 'VENDEDOR', 'ROTA', 'CODCLIENTE', 'CLIENTE']
         if 'FANTASIA' in data.columns:
             group_cols.append('FANTASIA')
 
-        tabela = data.groupby(group_cols + ['MES_ANO'])['QUANTIDADE'].sum().unstack(fill_value=0).reset_index()
+        tabela = pd.pivot_table(
+            data,
+            values='QUANTIDADE',
+            index=group_cols,
+            columns='MES_ANO',
+            aggfunc='sum',
+            fill_value=0,
+            observed=True
+        ).reset_index()
         tabela['CODCLIENTE'] = tabela['CODCLIENTE'].astype(str)
-        meses = sorted([col for col in tabela.columns if col not in group_cols])
+        meses = [col for col in tabela.columns if col not in group_cols]
         tabela['TOTAL'] = tabela[meses].sum(axis=1)
 
         return tabela[group_cols + meses + ['TOTAL']]
@@ -349,9 +550,17 @@ def criar_tabela_vendas_mensais_por_produto(data, fornecedor, ano):
 
     return tabela
 
+# CSV de exportação em cache: o download_button não reencoda a tabela a cada rerun.
+# to_csv escreve direto num buffer binário, sem montar a string inteira antes do encode
+@st.cache_data(show_spinner=False, ttl=300, max_entries=50)
+def tabela_to_csv(tabela):
+    buffer = io.BytesIO()
+    tabela.to_csv(buffer, index=False, sep=';', decimal=',', encoding='utf-8')
+    return buffer.getvalue()
+
 def main():
     try:
-        auto_reload()  # Verificar se é necessário reload
+        verificar_atualizacao()  # Reload automático e limpeza do cache quando houver dados novos
 
         st.markdown(
             """
@@ -383,32 +592,24 @@ def main():
             return
 
         with st.spinner("Carregando dados do Supabase..."):
-            data_vwsomelier = carregar_dados('VWSOMELIER', data_inicial, data_final)
-            data_pcpedc = carregar_dados('PCVENDEDOR', data_inicial, data_final)
-        
-        if data_vwsomelier.empty or data_pcpedc.empty:
-            logger.error("Não foi possível carregar os dados do Supabase.")
+            detalhes = calcular_detalhes_vendedores(data_inicial, data_final)
+
+        if detalhes is None:
             st.error("Não foi possível carregar os dados do Supabase.")
             return
 
-        data_inicial = pd.to_datetime(data_inicial)
-        data_final = pd.to_datetime(data_final)
-        vendedores, data_filtrada = calcular_detalhes_vendedores(data_vwsomelier, data_pcpedc, data_inicial, data_final)
+        vendedores, vendas_mensais_vendedores = detalhes
 
         if not vendedores.empty:
             exibir_detalhes_vendedores(vendedores)
-            vendedores_sorted = vendedores['NOME'].str.strip().str.upper().sort_values().reset_index(drop=True)
-
-            if 'ALTOMERCADO' in vendedores_sorted.values:
-                vendedor_default = vendedores_sorted[vendedores_sorted == 'ALTOMERCADO'].index[0]
-            else:
-                vendedor_default = 0
-
-            vendedor_default = int(vendedor_default)
-            vendedores_display = vendedores['NOME'].str.strip().sort_values().reset_index(drop=True)
+            # Uma única ordenação: o índice padrão é a posição de ALTOMERCADO na própria lista exibida
+            # Nomes em Arrow: strip/upper rodam nos kernels do pyarrow, sem um objeto Python por linha
+            vendedores_display = vendedores['NOME'].astype('string[pyarrow]').str.strip().sort_values().reset_index(drop=True)
+            posicoes_default = (vendedores_display.str.upper() == 'ALTOMERCADO').to_numpy(dtype=bool, na_value=False).nonzero()[0]
+            vendedor_default = int(posicoes_default[0]) if len(posicoes_default) else 0
             vendedor_selecionado = st.selectbox("Selecione um Vendedor", vendedores_display, index=vendedor_default)
             ano_selecionado = st.selectbox("Selecione um Ano para o Gráfico", [2024, 2025], index=1 if datetime.now().year == 2025 else 0)
-            exibir_grafico_vendas_por_vendedor(data_filtrada, vendedor_selecionado, ano_selecionado)
+            exibir_grafico_vendas_por_vendedor(vendas_mensais_vendedores, vendedor_selecionado, ano_selecionado)
         else:
             logger.warning("Não há dados para o período selecionado.")
             st.warning("Não há dados para o período selecionado.")
@@ -425,19 +626,7 @@ def main():
             return
 
         with st.spinner("Carregando dados de vendas..."):
-            data_vendas = carregar_dados('PCVENDEDOR', vendas_data_inicial, vendas_data_final)
-
-        if data_vendas.empty:
-            logger.error("Dados de vendas não puderam ser carregados para o período selecionado.")
-            st.error("Dados de vendas não puderam ser carregados para o período selecionado.")
-            return
-
-        data_vendas['DATAPEDIDO'] = pd.to_datetime(data_vendas['DATAPEDIDO'], errors='coerce')
-        data_vendas = data_vendas.dropna(subset=['DATAPEDIDO'])
-        vendas_data_inicial = pd.to_datetime(vendas_data_inicial)
-        vendas_data_final = pd.to_datetime(vendas_data_final)
-        data_vendas = data_vendas[(data_vendas['DATAPEDIDO'] >= vendas_data_inicial) & 
-                                (data_vendas['DATAPEDIDO'] <= vendas_data_final)].copy()
+            data_vendas = carregar_vendas_mensais(vendas_data_inicial, vendas_data_final)
 
         if data_vendas.empty:
             logger.warning("Nenhum dado encontrado para o período selecionado na seção de vendas por cliente.")
@@ -466,7 +655,7 @@ def main():
 
         with col_filtros:
             if tipo_filtro == "Fornecedor":
-                fornecedores = sorted(data_vendas['FORNECEDOR'].dropna().unique())
+                fornecedores = data_vendas['FORNECEDOR'].cat.categories.tolist()
                 selecionar_todos = st.checkbox(
                     "Selecionar Todos os Fornecedores", 
                     key="todos_fornecedores_check"
@@ -486,7 +675,7 @@ def main():
                     st.text(placeholder)
             
             elif tipo_filtro == "Produto":
-                produtos = sorted(data_vendas['PRODUTO'].dropna().unique())
+                produtos = data_vendas['PRODUTO'].cat.categories.tolist()
                 selecionar_todos = st.checkbox(
                     "Selecionar Todos os Produtos", 
                     key="todos_produtos_check"
@@ -516,7 +705,7 @@ def main():
             else:
                 filtro_bloqueado = "Todos"
 
-        vendedores = sorted(data_vendas['VENDEDOR'].dropna().unique())
+        vendedores = data_vendas['VENDEDOR'].cat.categories.tolist()
         selecionar_todos_vendedores = st.checkbox(
             "Selecionar Todos os Vendedores", 
             key="todos_vendedores_check"
@@ -531,37 +720,56 @@ def main():
                 key="vendedores_multiselect"
             )
 
+        # O pedido de relatório fica no session_state: o st_autorefresh reexecuta a página a cada minuto
+        # e o botão só é True na execução do clique, o que apagaria o relatório e os downloads
         if st.button("Gerar Relatório", key="gerar_relatorio_btn"):
             if not itens_selecionados:
+                st.session_state.pop('relatorio_vendas', None)
                 logger.warning("Nenhum item selecionado para gerar o relatório.")
                 st.warning("Nenhum item selecionado para gerar o relatório.")
                 return
 
+            st.session_state.relatorio_vendas = {
+                'periodo': (vendas_data_inicial, vendas_data_final),
+                'tipo_filtro': tipo_filtro,
+                'itens_selecionados': tuple(itens_selecionados),
+                # Com "Selecionar Todos" marcado, None evita o isin contra a lista inteira de itens
+                'filtro_itens': None if selecionar_todos else tuple(itens_selecionados),
+                'filtro_bloqueado': filtro_bloqueado,
+                'vendedores_selecionados': tuple(vendedores_selecionados),
+                'todos_vendedores': not vendedores_selecionados or len(vendedores_selecionados) == len(vendedores),
+            }
+
+        relatorio = st.session_state.get('relatorio_vendas')
+        if relatorio and relatorio['periodo'] != (vendas_data_inicial, vendas_data_final):
+            # Relatório gerado para outro período: data_vendas não corresponde mais a ele
+            st.session_state.pop('relatorio_vendas')
+            relatorio = None
+
+        if relatorio:
+            tipo_filtro = relatorio['tipo_filtro']
+            itens_selecionados = relatorio['itens_selecionados']
+            filtro_itens = relatorio['filtro_itens']
+            filtro_bloqueado = relatorio['filtro_bloqueado']
+            vendedores_selecionados = relatorio['vendedores_selecionados']
+
             with st.spinner("Processando dados..."):
-                if 'BLOQUEADO' in data_vendas.columns:
-                    if filtro_bloqueado == "Bloqueado":
-                        data_vendas = data_vendas[data_vendas['BLOQUEADO'] == 'S'].copy()
-                    elif filtro_bloqueado == "Não bloqueado":
-                        data_vendas = data_vendas[data_vendas['BLOQUEADO'] == 'N'].copy()
+                # Máscara única sobre o array numpy e seleção sem .copy(): daqui em diante data_vendas só é lido
+                if 'BLOQUEADO' in data_vendas.columns and filtro_bloqueado != "Todos":
+                    valor_bloqueado = 'S' if filtro_bloqueado == "Bloqueado" else 'N'
+                    data_vendas = data_vendas.loc[data_vendas['BLOQUEADO'].to_numpy() == valor_bloqueado]
                 
-                if not vendedores_selecionados or len(vendedores_selecionados) == len(vendedores):
-                    tabela = criar_tabela_vendas_mensais(data_vendas, tipo_filtro, itens_selecionados)
+                if relatorio['todos_vendedores']:
+                    tabela = criar_tabela_vendas_mensais(data_vendas, tipo_filtro, filtro_itens)
                     if not tabela.empty:
-                        gb = GridOptionsBuilder.from_dataframe(tabela)
-                        gb.configure_default_column(filter=True, sortable=True, resizable=True)
-                        gb.configure_column("TOTAL", filter=False)
-                        grid_options = gb.build()
-
-                        AgGrid(
+                        st.dataframe(
                             tabela,
-                            gridOptions=grid_options,
-                            update_mode=GridUpdateMode.NO_UPDATE,
-                            fit_columns_on_grid_load=False,
+                            use_container_width=True,
                             height=400,
-                            allow_unsafe_jscode=True,
+                            hide_index=True,
                         )
 
-                        csv = tabela.to_csv(index=False, sep=';', decimal=',').encode('utf-8')
+                        csv = tabela_to_csv(tabela)
                         st.download_button(
                             f"📥 Baixar CSV - {tipo_filtro}", 
                             data=csv,
@@ -573,27 +781,27 @@ def main():
                         st.warning(f"Nenhum dado encontrado para {tipo_filtro}: {', '.join(itens_selecionados)}")
                 
                 else:
+                    # VENDEDOR já é Categorical: um único groupby para todos os vendedores selecionados
+                    grupos_vendedor = dict(list(
+                        data_vendas[data_vendas['VENDEDOR'].isin(vendedores_selecionados)].groupby('VENDEDOR', observed=True)
+                    ))
+
                     for vendedor in vendedores_selecionados:
                         st.markdown(f"#### Vendedor: {vendedor}")
-                        tabela = criar_tabela_vendas_mensais(data_vendas, tipo_filtro, itens_selecionados, vendedor)
+                        dados_vendedor = grupos_vendedor.get(vendedor)
+                        if dados_vendedor is not None:
+                            tabela = criar_tabela_vendas_mensais(dados_vendedor, tipo_filtro, filtro_itens)
+                        else:
+                            tabela = pd.DataFrame()
                         if not tabela.empty:
-                            gb = GridOptionsBuilder.from_dataframe(tabela)
-                            gb.configure_default_column(filter=True, sortable=True, resizable=True)
-                            gb.configure_column("TOTAL", filter=False)
-                            grid_options = gb.build()
-
-                            AgGrid(
+                            st.dataframe(
                                 tabela,
-                                gridOptions=grid_options,
-                                update_mode=GridUpdateMode.NO_UPDATE,
-                                fit_columns_on_grid_load=False,
+                                use_container_width=True,
                                 height=400,
-                                allow_unsafe_jscode=True,
-                                wrapText=True,
-                                autoHeight=True
+                                hide_index=True,
                             )
 
-                            csv = tabela.to_csv(index=False, sep=';', decimal=',').encode('utf-8')
+                            csv = tabela_to_csv(tabela)
                             st.download_button(
                                 f"📥 Baixar CSV - {tipo_filtro} - {vendedor}", 
                                 data=csv,